@@ -1,65 +1,101 @@
 import sys
 import json
 from datetime import datetime, date
-from functools import wraps
+
+# Exact-type lookup for the common case; subclasses (e.g. pandas.Timestamp) fall back to isinstance
+_DT_ENCODERS = {
+    datetime: lambda obj: {"__type__": "datetime", "value": obj.isoformat()},
+    date: lambda obj: {"__type__": "date", "value": obj.isoformat()},
+}
+
 class DateTimeEncoder(json.JSONEncoder):
     def default(self, obj):
+        encoder = _DT_ENCODERS.get(type(obj))
+        if encoder is not None:
+            return encoder(obj)
         if isinstance(obj, (datetime, date)):
             return {"__type__": obj.__class__.__name__, "value": obj.isoformat()}
         return super().default(obj)
 
+_DT_DECODERS = {
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+}
+
 def datetime_decoder(dct):
-    if "__type__" in dct:
-        type_name = dct["__type__"]
-        if type_name == "datetime":
-            return datetime.fromisoformat(dct["value"])
-        elif type_name == "date":
-            return date.fromisoformat(dct["value"])
-    return dct
+    # called for every decoded JSON object, keep the common case (no "__type__") to a single lookup
+    type_name = dct.get("__type__")
+    if not isinstance(type_name, str):
+        # missing, or an unhashable value that cannot be one of our markers
+        return dct
+    decoder = _DT_DECODERS.get(type_name)
+    return decoder(dct["value"]) if decoder is not None else dct
+
+class DateTimeDecoder(json.JSONDecoder):
+    def __init__(self, *, object_hook=None, **kwargs):
+        super().__init__(object_hook=object_hook or datetime_decoder, **kwargs)
 
 original_import = __import__
 
+
+def _patch_matplotlib_pyplot(module):
+    module.show = lambda: module.savefig("plot.png")
+
+
+def _patch_moviepy_editor(module):
+    original_write_videofile = module.VideoClip.write_videofile
+    module.VideoClip.write_videofile = (
+        lambda self, *args, **kwargs: original_write_videofile(
+            self, *args, verbose=False, logger=None, **kwargs
+        )
+    )
+
+
+def _patch_pil(module):
+    original_import("PIL.ImageShow")
+    sys.modules["PIL.ImageShow"].show = lambda img, *args, **kwargs: img.save(
+        "image.png"
+    )
+
+
+def _patch_json(module):
+    # Patch json module to use our custom encoder by default
+    module.JSONEncoder = DateTimeEncoder
+    module._default_encoder = DateTimeEncoder(
+        skipkeys=False,
+        ensure_ascii=True,
+        check_circular=True,
+        allow_nan=True,
+        indent=None,
+        separators=None,
+        default=None,
+    )
+    # Decode with our custom decoder by default -- json.loads without arguments goes straight to _default_decoder
+    module.JSONDecoder = DateTimeDecoder
+    module._default_decoder = DateTimeDecoder()
+
+# Keyed by the name passed to __import__; the patcher receives sys.modules[name]
+# (for dotted names __import__ returns the top-level package, not the submodule)
+_PATCHERS = {
+    "matplotlib.pyplot": _patch_matplotlib_pyplot,
+    "moviepy.editor": _patch_moviepy_editor,
+    "PIL": _patch_pil,
+    "json": _patch_json,
+}
+
+# ids of module objects that were already patched, so that repeated imports do not patch twice
+_patched_module_ids = set()
+
+
 def patched_import(name, globals=None, locals=None, fromlist=(), level=0):
     module = original_import(name, globals, locals, fromlist, level)
 
-    if name == "matplotlib.pyplot":
-        sys.modules["matplotlib.pyplot"].show = lambda: sys.modules[
-            "matplotlib.pyplot"
-        ].savefig("plot.png")
-    elif name == "moviepy.editor":
-        original_write_videofile = sys.modules[
-            "moviepy.editor"
-        ].VideoClip.write_videofile
-        sys.modules["moviepy.editor"].VideoClip.write_videofile = (
-            lambda self, *args, **kwargs: original_write_videofile(
-                self, *args, verbose=False, logger=None, **kwargs
-            )
-        )
-    elif name == "PIL":
-        original_import("PIL.ImageShow", globals, locals, fromlist, level)
-        sys.modules["PIL.ImageShow"].show = lambda img, *args, **kwargs: img.save(
-            "image.png"
-        )
-    elif name == "json":
-            # Patch json module to use our custom encoder by default
-            module.JSONEncoder = DateTimeEncoder
-            module._default_encoder = DateTimeEncoder(
-                skipkeys=False,
-                ensure_ascii=True,
-                check_circular=True,
-                allow_nan=True,
-                indent=None,
-                separators=None,
-                default=None,
-            )
-            # Add loads with custom decoder
-            original_loads = module.loads
-            @wraps(original_loads)
-            def patched_loads(*args, **kwargs):
-                if 'object_hook' not in kwargs:
-                    kwargs['object_hook'] = datetime_decoder
-                return original_loads(*args, **kwargs)
-            module.loads = patched_loads
+    patcher = _PATCHERS.get(name)
+    if patcher is not None and level == 0:
+        target = sys.modules[name]
+        if id(target) not in _patched_module_ids:
+            _patched_module_ids.add(id(target))
+            patcher(target)
 
     return module
 
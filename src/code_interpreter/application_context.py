@@ -13,14 +13,17 @@
 # limitations under the License.
 
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from contextvars import ContextVar
 import logging
 import logging.config
 from functools import cached_property
+import multiprocessing
 
 import os
 from fastapi import FastAPI
 import grpc
+import httpx
 from code_interpreter.config import Config
 from code_interpreter.services.custom_tool_executor import CustomToolExecutor
 from code_interpreter.services.grpc_server import GrpcServer
@@ -45,7 +48,7 @@ class ApplicationContext:
             def filter(self, record):
                 record.request_id = (
                     request_id_context_var.get()
-                    or "00000000-0000-0000-0000-000000000000"
+                    or "00000000000000000000000000000000"
                 )
                 return True
 
@@ -67,7 +70,17 @@ class ApplicationContext:
     @cached_property
     def file_storage(self) -> Storage:
         os.makedirs(self.config.file_storage_path, exist_ok=True)
-        return Storage(storage_path=self.config.file_storage_path)
+        return Storage(
+            storage_path=self.config.file_storage_path,
+            chunk_size=self.config.file_storage_chunk_size,
+        )
+
+    @cached_property
+    def http_client(self) -> httpx.AsyncClient:
+        # shared by all executions, so that the SSL context and connection pool are set up only once
+        return httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        )
 
     @cached_property
     def code_executor(self) -> KubernetesCodeExecutor:
@@ -79,14 +92,24 @@ class ApplicationContext:
             executor_pod_spec_extra=self.config.executor_pod_spec_extra,
             executor_pod_queue_target_length=self.config.executor_pod_queue_target_length,
             executor_pod_name_prefix=self.config.executor_pod_name_prefix,
+            http_client=self.http_client,
         )
         asyncio.create_task(code_executor.fill_executor_pod_queue())
         return code_executor
 
+    def create_custom_tool_parse_executor(self) -> ProcessPoolExecutor:
+        # "spawn" -- forking a process with running gRPC threads is not safe
+        return ProcessPoolExecutor(
+            max_workers=self.config.custom_tool_parse_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
     @cached_property
     def custom_tool_executor(self) -> CustomToolExecutor:
         return CustomToolExecutor(
             code_executor=self.code_executor,
+            parse_executor_factory=self.create_custom_tool_parse_executor,
+            parse_cache_size=self.config.custom_tool_parse_cache_size,
         )
 
     @cached_property
@@ -73,8 +73,17 @@ class Config(BaseSettings):
     # path to store files
     file_storage_path: str = "./.tmp/files"
 
+    # size of the chunks (in bytes) used when streaming files from / to the storage
+    file_storage_chunk_size: int = 1024 * 1024
+
     # how many executor pods to keep ready for immediate use
     executor_pod_queue_target_length: int = 5
 
     # first part of executor pod name, followed by number
     executor_pod_name_prefix: str = "code-executor-"
+
+    # number of worker processes parsing custom tools, kept small since the container CPU limit is usually low
+    custom_tool_parse_workers: int = 2
+
+    # how many custom tools to keep cached, keyed by their source code (parse results and extracted imports)
+    custom_tool_parse_cache_size: int = 512
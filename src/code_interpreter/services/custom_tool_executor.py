@@ -13,40 +13,56 @@
 # limitations under the License.
 
 import ast
+import asyncio
+import collections
+import concurrent.futures
+import concurrent.futures.process
 from dataclasses import dataclass
+import functools
+import hashlib
 import json
+import logging
 import typing
-import inspect
-import re
 import textwrap
 
 from pydantic import validate_call
 
+from code_interpreter.services.custom_tool_parser import (
+    CustomTool,
+    CustomToolParseError,
+    parse_custom_tool,
+)
 from code_interpreter.services.kubernetes_code_executor import KubernetesCodeExecutor
 
 
-@dataclass
-class CustomTool:
-    name: str
-    description: str
-    input_schema: dict
-
-
-@dataclass
-class CustomToolParseError(Exception):
-    errors: list[str]
-
-
 @dataclass
 class CustomToolExecuteError(Exception):
     stderr: str
 
 
 class CustomToolExecutor:
-    def __init__(self, code_executor: KubernetesCodeExecutor):
+    def __init__(
+        self,
+        code_executor: KubernetesCodeExecutor,
+        parse_executor_factory: typing.Callable[[], concurrent.futures.Executor]
+        | None = None,
+        parse_cache_size: int = 512,
+    ):
         self.code_executor = code_executor
+        self.parse_executor_factory = parse_executor_factory
+        self.parse_executor = (
+            parse_executor_factory() if parse_executor_factory is not None else None
+        )
+        self.parse_cache_size = parse_cache_size
+        self._parse_cache: collections.OrderedDict[str, CustomTool] = (
+            collections.OrderedDict()
+        )
+        # the imports of tools being executed, bounded the same as the parse cache
+        self._tool_imports = functools.lru_cache(maxsize=parse_cache_size)(
+            _tool_imports
+        )
 
-    def parse(self, tool_source_code: str) -> CustomTool:
+    async def parse(self, tool_source_code: str) -> CustomTool:
         """
         Parse a Python function definition.
 
@@ -55,112 +71,46 @@ class CustomToolExecutor:
 
         Supported types for input arguments: int, float, str, bool, typing.Any, list[...], dict[str, ...], typing.Tuple[...], typing.Optional[...], typing.Union[...], where ... is any of the supported types.
         Supported types for return value: anything that can be JSON-serialized.
-        """
-        try:
-            *imports, function_def = ast.parse(textwrap.dedent(tool_source_code)).body
-        except SyntaxError as e:
-            raise CustomToolParseError([f"Syntax error: {e.msg} on line {e.lineno}"])
 
-        if not all(
-            isinstance(node, (ast.Import, ast.ImportFrom)) for node in imports
-        ) or not isinstance(function_def, ast.FunctionDef):
-            raise CustomToolParseError(
-                [
-                    "The tool source code must only define a single function, optionally preceded by imports."
-                ]
-            )
-
-        errors = [
-            x
-            for x in (
-                "The tool function must not have positional-only arguments"
-                if function_def.args.posonlyargs
-                else None,
-                "The tool function must not have *args"
-                if function_def.args.vararg
-                else None,
-                "The tool function must not have **kwargs"
-                if function_def.args.kwarg
-                else None,
-                "The tool function arguments must have type annotations"
-                if not all(
-                    arg.annotation
-                    for arg in (*function_def.args.args, *function_def.args.kwonlyargs)
-                )
-                else None,
-            )
-            if x is not None
-        ]
-
-        if errors:
-            raise CustomToolParseError(errors)
-
-        fn_description, return_description, param_descriptions = _parse_docstring(
-            ast.get_docstring(function_def) or ""
-        )
-
-        json_schema = {
-            "$schema": "http://json-schema.org/draft-07/schema#",
-            "type": "object",
-            "title": function_def.name,
-            "properties": {
-                arg.arg: _type_to_json_schema(arg.annotation)
-                | (
-                    {"description": param_description}
-                    if (param_description := param_descriptions.get(arg.arg))
-                    else {}
-                )
-                for arg in (*function_def.args.args, *function_def.args.kwonlyargs)
-                if arg.annotation
-            },
-            "required": [
-                arg.arg
-                for arg in (
-                    *function_def.args.args[: -len(function_def.args.defaults) or None],
-                    *(
-                        arg
-                        for arg, default in zip(
-                            function_def.args.kwonlyargs, function_def.args.kw_defaults
-                        )
-                        if default is None
-                    ),
-                )
-            ],
-            "additionalProperties": False,
-        }
-
-        return_type = (
-            ast.unparse(function_def.returns) if function_def.returns else None
-        )
-        return_full_description = " -- ".join(
-            s for s in (return_type, return_description) if s
-        )
+        Parsing runs in an executor created by `parse_executor_factory` (the default thread pool if not set), so it never blocks the event loop.
+        If a process pool worker dies, the pool is replaced and only the parses in flight fail.
+        Results are cached by source code, so the returned object must not be modified.
+        """
+        if (custom_tool := self._parse_cache.get(tool_source_code)) is not None:
+            self._parse_cache.move_to_end(tool_source_code)
+            return custom_tool
 
-        description = "\n\n".join(
-            s
-            for s in (
-                fn_description,
-                "Returns: " + return_full_description
-                if return_full_description
-                else None,
+        parse_executor = self.parse_executor
+        try:
+            custom_tool = await asyncio.get_running_loop().run_in_executor(
+                parse_executor, parse_custom_tool, tool_source_code
             )
-            if s
-        )
-
-        return CustomTool(
-            name=function_def.name,
-            description=description,
-            input_schema=json_schema,
-        )
+        except concurrent.futures.process.BrokenProcessPool:
+            # a worker died (e.g. OOM-killed), a broken pool would fail every later parse
+            if self.parse_executor is parse_executor:
+                parse_executor.shutdown(wait=False)
+                self.parse_executor = self.parse_executor_factory()
+            raise
+        self._parse_cache[tool_source_code] = custom_tool
+        if len(self._parse_cache) > self.parse_cache_size:
+            self._parse_cache.popitem(last=False)
+        return custom_tool
+
+    def shutdown(self) -> None:
+        """
+        Shut down the parse executor, if one was created.
+        """
+        if self.parse_executor is not None:
+            self.parse_executor.shutdown(wait=False, cancel_futures=True)
 
     @validate_call
     async def execute(
         self,
         tool_source_code: str,
         tool_input: dict[str, typing.Any],
-    ) -> typing.Any:
+    ) -> str:
         """
-        Execute the given custom tool with the given input.
+        Execute the given custom tool with the given input and return its output as a JSON string.
 
         The source code is expected to be valid according to the parse method.
         The input is expected to be valid according to the input schema produced by the parse method.
@@ -172,13 +122,7 @@ import contextlib
 import json
 
 # Import all tool dependencies here -- to aid the dependency detection
-{
-    "\n".join(
-        ast.unparse(node)
-        for node in ast.parse(textwrap.dedent(tool_source_code)).body
-        if isinstance(node, (ast.Import, ast.ImportFrom))
-    )
-}
+{self._tool_imports(tool_source_code)}
 
 with contextlib.redirect_stdout(None):
     inner_globals = {{}}
@@ -192,73 +136,44 @@ print(json.dumps(result))
         if result.exit_code != 0:
             raise CustomToolExecuteError(result.stderr)
 
-        return json.loads(result.stdout)
-
+        # the result is the last printed line, anything before it was printed while importing the tool dependencies
+        tool_output_json = result.stdout.strip().rpartition("\n")[2]
+        try:
+            json.loads(tool_output_json)
+        except ValueError as e:
+            raise CustomToolExecuteError(f"Custom tool produced invalid output: {e}")
+        return tool_output_json
 
-def _type_to_json_schema(type_node: ast.AST) -> dict:
-    if isinstance(type_node, ast.Subscript):
-        type_node_name = ast.unparse(type_node.value)
-        if type_node_name == "list":
-            return {"type": "array", "items": _type_to_json_schema(type_node.slice)}
-        elif type_node_name == "dict" and isinstance(type_node.slice, ast.Tuple):
-            key_type_node, value_type_node = type_node.slice.elts
-            if ast.unparse(key_type_node) != "str":
-                raise ValueError(f"Unsupported type: {type_node}")
-            return {
-                "type": "object",
-                "additionalProperties": _type_to_json_schema(value_type_node),
-            }
-        elif type_node_name == "Optional" or type_node_name == "typing.Optional":
-            return {"anyOf": [{"type": "null"}, _type_to_json_schema(type_node.slice)]}
-        elif (
-            type_node_name == "Union" or type_node_name == "typing.Union"
-        ) and isinstance(type_node.slice, ast.Tuple):
-            return {"anyOf": [_type_to_json_schema(el) for el in type_node.slice.elts]}
-        elif (
-            type_node_name == "Tuple" or type_node_name == "typing.Tuple"
-        ) and isinstance(type_node.slice, ast.Tuple):
-            return {
-                "type": "array",
-                "minItems": len(type_node.slice.elts),
-                "items": [_type_to_json_schema(el) for el in type_node.slice.elts],
-                "additionalItems": False,
-            }
 
-    type_node_name = ast.unparse(type_node)
-    if type_node_name == "int":
-        return {"type": "integer"}
-    elif type_node_name == "float":
-        return {"type": "number"}
-    elif type_node_name == "str":
-        return {"type": "string"}
-    elif type_node_name == "bool":
-        return {"type": "boolean"}
-    elif type_node_name == "Any" or type_node_name == "typing.Any":
-        return {"type": "array"}
-    else:
-        raise ValueError(f"Unsupported type: {type_node_name}")
+def source_code_digest(tool_source_code: str) -> str:
+    """
+    Short digest of the tool source code, used to identify tools in logs without logging the whole source.
+    """
+    return hashlib.blake2b(tool_source_code.encode(), digest_size=8).hexdigest()
 
 
-def _parse_docstring(docstring: str) -> typing.Tuple[str, str, dict[str, str]]:
+def log_custom_tool(logger: logging.Logger, verb: str, tool_source_code: str) -> None:
+    """
+    Log that a custom tool is being processed, by digest and length at INFO and with the full source code at DEBUG.
     """
-    Parse a docstring in the ReST format and return the function description, return description and a dictionary of parameter descriptions.
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "%s custom tool %s (%d characters)",
+            verb,
+            source_code_digest(tool_source_code),
+            len(tool_source_code),
+        )
+    logger.debug("Custom tool source code: %s", tool_source_code)
 
-    Supported docstring directives are :param, :return.
+
+def _tool_imports(tool_source_code: str) -> str:
+    """
+    Return the import statements of the tool source code, one per line.
     """
-    clean_docstring = inspect.cleandoc(docstring)
-    chunks = [
-        chunk.strip()
-        for chunk in re.split(r"(^|\n)\s*:", clean_docstring, flags=re.MULTILINE)
-    ]
-    fn_description = chunks[0]
-    param_descriptions = {}
-    return_description = ""
-    for chunk in chunks[1:]:
-        if match := re.match(
-            r"param ([a-z_]+): ((?:.|\n)+)", chunk, flags=re.MULTILINE
-        ):
-            param_name, param_description = match.groups()
-            param_descriptions[param_name] = param_description
-        elif match := re.match(r"return: ((?:.|\n)+)", chunk, flags=re.MULTILINE):
-            return_description = match.group(1)
-    return fn_description, return_description, param_descriptions
+    return "\n".join(
+        ast.unparse(node)
+        for node in ast.parse(textwrap.dedent(tool_source_code)).body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
@@ -16,13 +16,14 @@ import logging
 import grpc
 import protovalidate
 from contextvars import ContextVar
-import uuid
 from code_interpreter.services.custom_tool_executor import (
     CustomToolExecuteError,
     CustomToolExecutor,
     CustomToolParseError,
+    log_custom_tool,
 )
 from code_interpreter.services.kubernetes_code_executor import KubernetesCodeExecutor
+from code_interpreter.utils.request_id import generate_request_id
 from google.protobuf.message import Message
 
 import proto.code_interpreter.v1.code_interpreter_service_pb2 as code_interpreter_pb2
@@ -57,7 +58,7 @@ class CodeInterpreterServicer(code_interpreter_pb2_grpc.CodeInterpreterServiceSe
         request: code_interpreter_pb2.ExecuteRequest,
         context: grpc.aio.ServicerContext,
     ) -> code_interpreter_pb2.ExecuteResponse:
-        self.request_id_context_var.set(str(uuid.uuid4()))
+        self.request_id_context_var.set(generate_request_id())
         logger.info(
             "Executing code with files %s: %s", request.files, request.source_code
         )
@@ -85,12 +86,12 @@ class CodeInterpreterServicer(code_interpreter_pb2_grpc.CodeInterpreterServiceSe
         request: code_interpreter_pb2.ParseCustomToolRequest,
         context: grpc.aio.ServicerContext,
     ) -> code_interpreter_pb2.ParseCustomToolResponse:
-        self.request_id_context_var.set(str(uuid.uuid4()))
-        logger.info("Parsing custom tool with source code %s", request.tool_source_code)
+        self.request_id_context_var.set(generate_request_id())
+        log_custom_tool(logger, "Parsing", request.tool_source_code)
         await self._validate_request(request, context)
 
         try:
-            custom_tool = self.custom_tool_executor.parse(
+            custom_tool = await self.custom_tool_executor.parse(
                 tool_source_code=request.tool_source_code
             )
         except CustomToolParseError as e:
@@ -101,10 +102,11 @@ class CodeInterpreterServicer(code_interpreter_pb2_grpc.CodeInterpreterServiceSe
 
         result = {
             "tool_name": custom_tool.name,
-            "tool_input_schema_json": json.dumps(custom_tool.input_schema),
+            "tool_input_schema_json": custom_tool.input_schema_json,
             "tool_description": custom_tool.description,
         }
-        logger.info("Parsed custom tool %s", result)
+        logger.info("Parsed custom tool %s", result["tool_name"])
+        logger.debug("Parsed custom tool %s", result)
         return code_interpreter_pb2.ParseCustomToolResponse(success=result)
 
     async def ExecuteCustomTool(
@@ -112,14 +114,13 @@ class CodeInterpreterServicer(code_interpreter_pb2_grpc.CodeInterpreterServiceSe
         request: code_interpreter_pb2.ExecuteCustomToolRequest,
         context: grpc.aio.ServicerContext,
     ) -> code_interpreter_pb2.ExecuteCustomToolResponse:
-        self.request_id_context_var.set(str(uuid.uuid4()))
-        logger.info(
-            "Executing custom tool with source code %s", request.tool_source_code
-        )
+        self.request_id_context_var.set(generate_request_id())
+        log_custom_tool(logger, "Executing", request.tool_source_code)
         await self._validate_request(request, context)
 
         try:
-            result = await self.custom_tool_executor.execute(
+            tool_output_json = await self.custom_tool_executor.execute(
+                # stdlib json: unlike orjson it keeps big integers exact and accepts NaN / Infinity
                 tool_input=json.loads(request.tool_input_json),
                 tool_source_code=request.tool_source_code,
             )
@@ -129,7 +130,8 @@ class CodeInterpreterServicer(code_interpreter_pb2_grpc.CodeInterpreterServiceSe
                 error={"stderr": str(e)}
             )
 
-        logger.info("Executed custom tool with result %s", result)
+        logger.info("Executed custom tool")
+        logger.debug("Executed custom tool with result %s", tool_output_json)
         return code_interpreter_pb2.ExecuteCustomToolResponse(
-            success={"tool_output_json": json.dumps(result)}
+            success={"tool_output_json": tool_output_json}
         )
@@ -12,21 +12,35 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import functools
 import json
 import logging
-import uuid
 from contextvars import ContextVar
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 
+import orjson
+from code_interpreter.utils.request_id import generate_request_id
 from code_interpreter.utils.validation import AbsolutePath, Hash
-from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, Response
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi import (
+    FastAPI,
+    Header,
+    HTTPException,
+    Request,
+    status,
+    UploadFile,
+    Response,
+)
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
 from code_interpreter.services.storage import Storage
 from code_interpreter.services.custom_tool_executor import (
     CustomToolExecuteError,
     CustomToolExecutor,
     CustomToolParseError,
+    log_custom_tool,
 )
 from code_interpreter.services.kubernetes_code_executor import KubernetesCodeExecutor
 
@@ -72,24 +86,80 @@ class ExecuteCustomToolErrorResponse(BaseModel):
     stderr: str
 
 
+def _model_response(model: BaseModel, status_code: int = 200) -> Response:
+    """
+    Serialize the model straight to JSON bytes, skipping FastAPI's response_model re-validation and dict round trip.
+    """
+    return Response(
+        content=model.model_dump_json(),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_error_body(errors: tuple[str, ...]) -> bytes:
+    """
+    JSON body of a ParseCustomToolErrorResponse, cached since a broken tool tends to be submitted repeatedly.
+    """
+    return orjson.dumps({"error_messages": list(errors)})
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    return if_none_match.strip() == "*" or etag in (
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    )
+
+
+async def _iter_upload(file: UploadFile, chunk_size: int) -> AsyncIterator[bytes]:
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+async def _custom_tool_parse_error_handler(request: Request, e: CustomToolParseError):
+    logger.warning("Invalid custom tool: %s", e.errors)
+    return Response(
+        content=_parse_error_body(tuple(e.errors)),
+        status_code=status.HTTP_400_BAD_REQUEST,
+        media_type="application/json",
+    )
+
+
+async def _custom_tool_execute_error_handler(
+    request: Request, e: CustomToolExecuteError
+):
+    logger.warning("Error executing custom tool: %s", e)
+    return _model_response(
+        ExecuteCustomToolErrorResponse(stderr=str(e)),
+        status_code=status.HTTP_400_BAD_REQUEST,
+    )
+
+
 def create_http_server(
     code_executor: KubernetesCodeExecutor,
     custom_tool_executor: CustomToolExecutor,
     request_id_context_var: ContextVar[str],
     file_storage: Storage,
 ):
-    app = FastAPI()
+    app = FastAPI(
+        default_response_class=ORJSONResponse,
+        exception_handlers={
+            CustomToolParseError: _custom_tool_parse_error_handler,
+            CustomToolExecuteError: _custom_tool_execute_error_handler,
+        },
+    )
 
-    def set_request_id():
-        request_id = str(uuid.uuid4())
+    @app.middleware("http")
+    async def set_request_id(request: Request, call_next):
+        request_id = generate_request_id()
         request_id_context_var.set(request_id)
-        return request_id
+        request.state.request_id = request_id
+        response = await call_next(request)
+        response.headers["X-Request-Id"] = request_id
+        return response
     
     @app.delete("/v1/files/{file_hash}")
-    async def delete_file(
-        file_hash: str,
-        request_id: str = Depends(set_request_id)
-    ):
+    async def delete_file(file_hash: str):
         await file_storage.delete(file_hash)
         logger.info("Deleted file with hash %s", file_hash)
         return {"message": "File deleted"}
@@ -98,23 +168,47 @@ def create_http_server(
     async def get_file(
         file_hash: str,
         delete: bool = False,
-        request_id: str = Depends(set_request_id)
+        if_none_match: Optional[str] = Header(None),
     ):
-        """Get file content by hash, with optional deletion after retrieval."""
+        """
+        Stream file content by hash, with optional deletion after retrieval.
+
+        With `delete`, the file is deleted once the response has been sent, so it may still be briefly readable after the response arrives.
+        """
         try:
-            async with file_storage.reader(file_hash) as file_reader:
-                content = await file_reader.read()
-                
-            if delete:
+            size = await file_storage.size(file_hash)
+
+            async def delete_file_after_response():
                 await file_storage.delete(file_hash)
                 logger.info("Deleted file with hash %s", file_hash)
-                
-            return Response(
-                content=content,
+
+            # objects are never modified after being written, so the hash is a strong ETag
+            etag = f'"{file_hash}"'
+            headers = {
+                "ETag": etag,
+                # files belong to a single user and are gone once downloaded with delete, never let shared caches keep them
+                "Cache-Control": "no-store"
+                if delete
+                else "private, max-age=31536000, immutable",
+            }
+            background = BackgroundTask(delete_file_after_response) if delete else None
+
+            if if_none_match is not None and _etag_matches(etag, if_none_match):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers=headers,
+                    background=background,
+                )
+
+            return StreamingResponse(
+                file_storage.read_streaming(file_hash),
                 media_type="application/octet-stream",
-                headers={
-                    "Content-Disposition": f"attachment; filename={file_hash}"
-                }
+                headers=headers
+                | {
+                    "Content-Disposition": f"attachment; filename={file_hash}",
+                    "Content-Length": str(size),
+                },
+                background=background,
             )
         except FileNotFoundError:
             raise HTTPException(
@@ -126,14 +220,16 @@ def create_http_server(
             raise HTTPException(status_code=500, detail=str(e))
 
     @app.put("/v1/files")
-    async def write_file(
-        file: UploadFile,
-        request_id: str = Depends(set_request_id)
-    ):
-        """Write uploaded file data to storage and return the hash."""
+    async def write_file(file: UploadFile):
+        """Stream uploaded file data to storage and return the hash."""
         try:
-            content = await file.read()
-            stored_hash = await file_storage.write(content)
+            if getattr(file.file, "_rolled", False):
+                # the upload was spooled to a temporary file, copy it without reading it into memory
+                stored_hash = await file_storage.write_from_file(file.file)
+            else:
+                stored_hash = await file_storage.write_streaming(
+                    _iter_upload(file, chunk_size=file_storage.chunk_size)
+                )
             logger.info("Wrote file with hash %s", stored_hash)
             return {"hash": stored_hash}
         except Exception as e:
@@ -141,12 +237,20 @@ def create_http_server(
             raise HTTPException(status_code=500, detail=str(e))
 
     @app.post("/v1/execute", response_model=ExecuteResponse)
-    async def execute(
-        request: ExecuteRequest, request_id: str = Depends(set_request_id)
-    ):
+    async def execute(request: ExecuteRequest):
         logger.info(
             "Executing code with files %s: %s", request.files, request.source_file
         )
+        try:
+            # warm up all input files at once and fail before an executor pod is used up
+            await asyncio.gather(
+                *(
+                    file_storage.prefetch(file_hash)
+                    for file_hash in request.files.values()
+                )
+            )
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
         try:
             result = await code_executor.execute(
                 source_file=request.source_file,
@@ -162,54 +266,57 @@ def create_http_server(
     @app.post(
         "/v1/parse-custom-tool",
         response_model=ParseCustomToolResponse,
+        responses={400: {"model": ParseCustomToolErrorResponse}},
     )
-    async def parse_custom_tool(
-        request: ParseCustomToolRequest, request_id: str = Depends(set_request_id)
-    ):
-        logger.info("Parsing custom tool with source code %s", request.tool_source_code)
-        custom_tool = custom_tool_executor.parse(
+    async def parse_custom_tool(request: ParseCustomToolRequest):
+        log_custom_tool(logger, "Parsing", request.tool_source_code)
+        custom_tool = await custom_tool_executor.parse(
             tool_source_code=request.tool_source_code
         )
         result = ParseCustomToolResponse(
             tool_name=custom_tool.name,
-            tool_input_schema_json=json.dumps(custom_tool.input_schema),
+            tool_input_schema_json=custom_tool.input_schema_json,
             tool_description=custom_tool.description,
         )
-        logger.info("Parsed custom tool %s", result)
-        return result
-
-    @app.exception_handler(CustomToolParseError)
-    async def validation_exception_handler(request, e):
-        logger.warning("Invalid custom tool: %s", e.errors)
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=ParseCustomToolErrorResponse(error_messages=e.errors).model_dump(),
-        )
+        logger.info("Parsed custom tool %s", result.tool_name)
+        logger.debug("Parsed custom tool %s", result)
+        return _model_response(result)
 
     @app.post(
         "/v1/execute-custom-tool",
         response_model=ExecuteCustomToolResponse,
+        responses={400: {"model": ExecuteCustomToolErrorResponse}},
+        openapi_extra={
+            "requestBody": {
+                "content": {
+                    "application/json": {
+                        "schema": ExecuteCustomToolRequest.model_json_schema()
+                    }
+                },
+                "required": True,
+            }
+        },
     )
-    async def execute_custom_tool(
-        request: ExecuteCustomToolRequest,
-        request_id: str = Depends(set_request_id),
-    ):
-        logger.info(
-            "Executing custom tool with source code %s", request.tool_source_code
-        )
-        result = await custom_tool_executor.execute(
+    async def execute_custom_tool(http_request: Request):
+        # validate the raw body bytes in pydantic-core directly, instead of json.loads into a dict and validating that
+        try:
+            request = ExecuteCustomToolRequest.model_validate_json(
+                await http_request.body()
+            )
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+            )
+        log_custom_tool(logger, "Executing", request.tool_source_code)
+        tool_output_json = await custom_tool_executor.execute(
+            # stdlib json: unlike orjson it keeps big integers exact and accepts NaN / Infinity
             tool_input=json.loads(request.tool_input_json),
             tool_source_code=request.tool_source_code,
         )
-        logger.info("Executed custom tool with result %s", result)
-        return ExecuteCustomToolResponse(tool_output_json=json.dumps(result))
-
-    @app.exception_handler(CustomToolExecuteError)
-    async def validation_exception_handler(request, e):
-        logger.warning("Error executing custom tool: %s", e)
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=ExecuteCustomToolErrorResponse(stderr=str(e)).model_dump(),
+        logger.info("Executed custom tool")
+        logger.debug("Executed custom tool with result %s", tool_output_json)
+        return _model_response(
+            ExecuteCustomToolResponse(tool_output_json=tool_output_json)
         )
 
     return app
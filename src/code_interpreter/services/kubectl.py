@@ -14,8 +14,8 @@
 
 import asyncio
 from inspect import signature
-import json
 import logging
+import orjson
 import shlex
 from typing import Any, Awaitable, Callable, Literal, get_overloads, overload
 
@@ -84,7 +84,7 @@ class Kubectl:
         process = await self._spawn_process(*args, **kwargs)
         if input and process.stdin:
             if isinstance(input, list) or isinstance(input, dict):
-                input = json.dumps(input)
+                input = orjson.dumps(input)
             if isinstance(input, str):
                 input = input.encode()
             process.stdin.write(input)
@@ -126,7 +126,7 @@ class Kubectl:
             output_str = await self._command(
                 name.replace("_", "-"), *args, input=input, output="json", **kwargs
             )
-            return json.loads(output_str)
+            return orjson.loads(output_str)
 
         return command_json
 
@@ -61,6 +61,7 @@ class KubernetesCodeExecutor:
         executor_pod_spec_extra: dict,
         executor_pod_queue_target_length: int,
         executor_pod_name_prefix: str,
+        http_client: httpx.AsyncClient,
     ) -> None:
         self.kubectl = kubectl
         self.executor_image = executor_image
@@ -72,6 +73,7 @@ class KubernetesCodeExecutor:
         self.executor_pod_queue_spawning_count = 0
         self.executor_pod_queue = collections.deque()
         self.executor_pod_name_prefix = executor_pod_name_prefix
+        self.http_client = http_client
 
     @retry(
         retry=retry_if_exception_type(RuntimeError),
@@ -94,9 +96,8 @@ class KubernetesCodeExecutor:
 
         Every time, a fresh pod is taken from a queue. It is discarded after use.
         """
-        async with self.executor_pod() as executor_pod, httpx.AsyncClient(
-            timeout=timeout
-        ) as client:
+        client = self.http_client
+        async with self.executor_pod() as executor_pod:
             executor_pod_ip = executor_pod["status"]["podIP"]
 
             # logger.info("Storing %s upload files", len(upload_files))
@@ -107,15 +108,15 @@ class KubernetesCodeExecutor:
             
             # files = {**files, **upload_file_hashes}
             async def upload_file(file_path, file_hash):
-                async with self.file_storage.reader(file_hash) as file_reader:
-                    if file_path.startswith("/runtime-packages/"):
-                        upload_path = f"/runtime-packages/{file_path}"
-                    else:
-                        upload_path = f"/workspace/{file_path}"
-                    return await client.put(
-                        f"http://{executor_pod_ip}:8000{upload_path}",
-                        data=file_reader,
-                    )
+                if file_path.startswith("/runtime-packages/"):
+                    upload_path = f"/runtime-packages/{file_path}"
+                else:
+                    upload_path = f"/workspace/{file_path}"
+                return await client.put(
+                    f"http://{executor_pod_ip}:8000{upload_path}",
+                    content=self.file_storage.read_streaming(file_hash),
+                    timeout=timeout,
+                )
 
             logger.info("Uploading %s files to executor pod", len(files))
             await asyncio.gather(
@@ -132,6 +133,7 @@ class KubernetesCodeExecutor:
                     json={
                         "source_file": source_file,
                     },
+                    timeout=timeout,
                 )
             ).json()
 
@@ -139,9 +141,12 @@ class KubernetesCodeExecutor:
                 async with self.file_storage.writer() as stored_file, client.stream(
                     "GET",
                     f"http://{executor_pod_ip}:8000/workspace/{file_path.removeprefix("/workspace/")}",
+                    timeout=timeout,
                 ) as pod_file:
                     pod_file.raise_for_status()
-                    async for chunk in pod_file.aiter_bytes():
+                    async for chunk in pod_file.aiter_bytes(
+                        self.file_storage.chunk_size
+                    ):
                         await stored_file.write(chunk)
                 return file_path, stored_file.hash
 
@@ -13,9 +13,12 @@
 # limitations under the License.
 
 from contextlib import asynccontextmanager
+import contextlib
+import os
 import secrets
-from typing import AsyncIterator, Protocol
-from anyio import Path
+import shutil
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Protocol
+from anyio import Path, to_thread
 from pydantic import validate_call
 
 from code_interpreter.utils.validation import Hash
@@ -38,8 +41,9 @@ class Storage:
     This implementation is backed by the filesystem, where each object is stored as a file named by its hash.
     """
 
-    def __init__(self, storage_path: str):
+    def __init__(self, storage_path: str, chunk_size: int = 1024 * 1024):
         self.storage_path = Path(storage_path)
+        self.chunk_size = chunk_size
 
     @asynccontextmanager
     async def writer(self) -> AsyncIterator[ObjectWriter]:
@@ -62,6 +66,30 @@ class Storage:
             await f.write(data)
             return f.hash
 
+    async def write_streaming(self, chunks: AsyncIterable[bytes]) -> str:
+        """
+        Writes the data from an async iterable of chunks to the storage and returns the hash of the object.
+
+        Only one chunk is held in memory at a time.
+        """
+        async with self.writer() as f:
+            async for chunk in chunks:
+                await f.write(chunk)
+            return f.hash
+
+    async def write_from_file(self, source: BinaryIO) -> str:
+        """
+        Copies the whole content of an open file (e.g. an upload spooled to disk) to the storage and returns the hash of the object.
+
+        The data is copied kernel-side with os.sendfile where possible, without passing through Python buffers.
+        """
+        await self.storage_path.mkdir(parents=True, exist_ok=True)
+        hash = secrets.token_hex(32)
+        await to_thread.run_sync(
+            _copy_file, source, str(self.storage_path / hash), self.chunk_size
+        )
+        return hash
+
     @asynccontextmanager
     @validate_call
     async def reader(self, object_hash: Hash) -> AsyncIterator[ObjectReader]:
@@ -82,6 +110,46 @@ class Storage:
         async with self.reader(object_hash) as f:
             return await f.read()
 
+    @validate_call
+    async def read_streaming(
+        self, object_hash: Hash, chunk_size: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Reads the object with the given hash and yields its content in chunks of at most `chunk_size` bytes.
+
+        Defaults to the chunk size the storage was configured with.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        async with self.reader(object_hash) as f:
+            while chunk := await f.read(chunk_size):
+                yield chunk
+
+    @validate_call
+    async def size(self, object_hash: Hash) -> int:
+        """
+        Return the size of the object with the given hash in bytes.
+
+        Raises FileNotFoundError if the object does not exist.
+        """
+        try:
+            return (await (self.storage_path / object_hash).stat()).st_size
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {object_hash}")
+
+    @validate_call
+    async def prefetch(self, object_hash: Hash) -> None:
+        """
+        Hint the OS to start loading the object into the page cache ahead of an upcoming read.
+
+        Raises FileNotFoundError if the object does not exist.
+        """
+        try:
+            await to_thread.run_sync(
+                _fadvise_willneed, str(self.storage_path / object_hash)
+            )
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {object_hash}")
+
     @validate_call
     async def exists(self, object_hash: Hash) -> bool:
         """
@@ -99,3 +167,38 @@ class Storage:
             await file_path.unlink()
         else:
             raise FileNotFoundError(f"File not found: {object_hash}")
+
+
+def _fadvise_willneed(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def _copy_file(source: BinaryIO, target_path: str, chunk_size: int) -> None:
+    try:
+        with open(target_path, "wb") as target:
+            size = os.fstat(source.fileno()).st_size
+            offset = 0
+            try:
+                while offset < size:
+                    sent = os.sendfile(
+                        target.fileno(), source.fileno(), offset, size - offset
+                    )
+                    if sent == 0:
+                        break
+                    offset += sent
+            except (AttributeError, OSError):
+                # os.sendfile is missing or cannot write to regular files on this platform
+                if offset:
+                    raise
+                source.seek(0)
+                shutil.copyfileobj(source, target, chunk_size)
+    except BaseException:
+        # do not leave a truncated object behind
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(target_path)
+        raise
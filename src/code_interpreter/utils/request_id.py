@@ -0,0 +1,36 @@
+# Copyright 2024 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import os
+
+_BATCH_SIZE = 1024
+
+_request_id_pool: collections.deque[str] = collections.deque()
+
+
+def generate_request_id() -> str:
+    """
+    Return a random 128-bit request id as a hex string.
+
+    Ids are generated in batches, so that a single os.urandom call serves 1024 requests.
+    """
+    try:
+        return _request_id_pool.popleft()
+    except IndexError:
+        entropy = os.urandom(16 * _BATCH_SIZE).hex()
+        _request_id_pool.extend(
+            entropy[i : i + 32] for i in range(32, len(entropy), 32)
+        )
+        return entropy[:32]
@@ -1,5 +1,6 @@
 import json
 from pathlib import Path
+import time
 import pytest
 import httpx
 from code_interpreter.config import Config
@@ -85,6 +86,43 @@ with open('file.txt', 'r') as f:
     assert not response_json["files"]
 
 
+def test_request_id_header(http_client: httpx.Client):
+    first = http_client.get("/v1/files/nonexistent")
+    second = http_client.get("/v1/files/nonexistent")
+    assert first.headers["X-Request-Id"]
+    assert first.headers["X-Request-Id"] != second.headers["X-Request-Id"]
+
+
+def test_upload_and_download_file(http_client: httpx.Client):
+    file_content = b"Hello, World!" * 100_000
+
+    response = http_client.put("/v1/files", files={"file": ("file.bin", file_content)})
+    assert response.status_code == 200
+    file_hash = response.json()["hash"]
+
+    response = http_client.get(f"/v1/files/{file_hash}")
+    assert response.status_code == 200
+    assert response.headers["Content-Length"] == str(len(file_content))
+
+    response = http_client.get(
+        f"/v1/files/{file_hash}", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert response.status_code == 304
+    assert not response.content
+
+    response = http_client.get(f"/v1/files/{file_hash}", params={"delete": True})
+    assert response.status_code == 200
+    assert response.content == file_content
+
+    # the file is deleted after the response has been sent, so wait for it to disappear
+    deadline = time.monotonic() + 5
+    while (
+        response := http_client.get(f"/v1/files/{file_hash}")
+    ).status_code != 404 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert response.status_code == 404
+
+
 def test_parse_custom_tool_success(http_client: httpx.Client):
     response = http_client.post(
         "/v1/parse-custom-tool",
@@ -244,3 +282,26 @@ def test_execute_custom_tool_error(http_client: httpx.Client):
     assert response.status_code == 400
     response_json = response.json()
     assert "division by zero" in response_json["stderr"]
+
+
+def test_execute_custom_tool_malformed_body(http_client: httpx.Client):
+    response = http_client.post(
+        "/v1/execute-custom-tool",
+        content=b"not json",
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body"]
+
+
+def test_execute_custom_tool_missing_field(http_client: httpx.Client):
+    response = http_client.post(
+        "/v1/execute-custom-tool",
+        json={
+            "tool_source_code": "def adding_tool(a: int, b: int) -> int:\n  return a + b",
+        },
+    )
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "tool_input_json"]